@@ -1,8 +1,10 @@
 # commands -> terminal symbols (lowercase)
 # id is cxx where xx is number.
 # value is command
-import re
-from os.path import exists
+from typing import Optional
+
+from executor import Executor
+from substitution import substitute_parameters
 
 commands: dict[str, str] = {
     "c10": "az login -u <username> -p <password>",
@@ -34,73 +36,18 @@ activities: dict[str, str] = {
 starting_state: str = "A10 | A20"
 
 
-def convert_to_file_name(file_name: str) -> str:
-    """Converts string to safe filename"""
-    file_name = str(file_name).replace(" ", "-")
-    return "".join(x for x in file_name if x.isalnum() or x == "-")
-
-
-def execute_command(command: str) -> bool:
+def execute_command(command: str, executor: Optional[Executor] = None) -> Optional[bool]:
     """
     Executes provided command with command substitution from param files.
-    Returns true if command was able to executed successfully.
+    Without an executor, the possible substitutions are only printed.
+    Returns true if command was able to executed successfully, or None if it was only printed.
     """
-    # print(f"Executing command. cmd:{command}")
-
-    pattern = re.compile(r"([\<|\[|\{\(](\S*)[\>|\]|\}|\)])", re.MULTILINE)
-    matches = re.findall(pattern, command)
-
-    parameter_names = [match[1] for match in matches if match[1]]
-    number_of_params = len(parameter_names)
-    param_options = []
-    options_per_param = []
-
-    # load options for parameters
-    for name in parameter_names:
-        file_name = "params/" + convert_to_file_name(name) + ".csv"
-
-        # create the file if not exists
-        if not exists(file_name):
-            file = open(file_name, "x")
-            file.close()
-
-        file = open(file_name, "r")
-        ops = [line.rstrip() for line in file]
-        param_options.append(ops)
-        options_per_param.append(len(ops))
-        file.close()
-
-    # attempt all until successful
-    current_attempt = [0] * number_of_params
-    combinations = 1
-    for option_count in options_per_param:
-        combinations *= option_count
-
-    for _ in range(combinations):
-        for i in range(number_of_params):
-            if current_attempt[i] < options_per_param[i] - 1:
-                current_attempt[i] += 1
-                break
-            else:
-                current_attempt[i] = 0
-        # print(current_attempt)
-        # try sub
-        words = re.split(pattern, command)
-        j = 0
-        for k in range(len(words)):
-            word: str = words[k]
-            if re.match(pattern, word):
-                words[k] = param_options[j][current_attempt[j]]
-                words[k + 1] = ""  # clear next
-                j += 1
+    if executor is not None:
+        return executor.execute_command(command)
 
-        full_command = "".join(words)
+    for full_command in substitute_parameters(command):
         print("\t> " + full_command)
-        # return_code = subprocess.call(full_command, shell=True)
-        # if return_code == 0:
-        #     return True
-        # else:
-        #     return False
+    return None
 
 
 def expand(symbol: str, state: list[str], result: list[list[str]]) -> None:
@@ -1,12 +1,10 @@
 import re
-import subprocess
 from os.path import exists
-from typing import List
+from typing import List, Optional
 
+from executor import Executor
+from substitution import convert_to_file_name, parameter_pattern, substitute_parameters
 
-def convert_to_file_name(file_name: str) -> str:
-    file_name = str(file_name).replace(" ", "-")
-    return "".join(x for x in file_name if x.isalnum() or x == "-")
 
 class Command:
     """
@@ -19,59 +17,29 @@ class Command:
         self.index = index
         self.text = text
 
-    def execute_command(self) -> None:
+    def get_parameter_names(self) -> List[str]:
+        """
+        Finds the parameters within the command text.
+        Names are normalised to match the param file names, i.e. '<resource-group>' -> 'resource-group'.
+        :return: the parameter names in order of appearance.
+        """
+        matches = re.findall(parameter_pattern, self.text)
+        return [convert_to_file_name(match[1]) for match in matches if match[1]]
+
+    def execute_command(self, executor: Optional[Executor] = None) -> Optional[bool]:
+        """
+        Executes the command, trying each parameter substitution until one succeeds.
+        Without an executor, the possible substitutions are only printed.
+        :return: true if the command executed successfully, or None if it was only printed.
+        """
         print(f"Executing command. idx:{self.index} cmd:{self.text}")
 
-        pattern = re.compile(r"([\<|\[|\{\(](\S*)[\>|\]|\}|\)])", re.MULTILINE)
-        matches = re.findall(pattern, self.text)
-
-        parameter_names = [match[1] for match in matches if match[1]]
-        number_of_params = len(parameter_names)
-        param_options = []
-        options_per_param = []
-
-        # load options for parameters
-        for name in parameter_names:
-            file_name = "params/" + convert_to_file_name(name) + ".csv"
-
-            # create the file if not exists
-            if not exists(file_name):
-                file = open(file_name, "x")
-                file.close()
-
-            file = open(file_name, "r")
-            ops = [line.rstrip() for line in file]
-            param_options.append(ops)
-            options_per_param.append(len(ops))
-
-        # attempt all until successful
-        current_attempt = [0, 0, 0]
-        combinations = 1
-        for option_count in options_per_param:
-            combinations *= option_count
-
-        for _ in range(combinations):
-            for i in range(number_of_params):
-                if current_attempt[i] < options_per_param[i] - 1:
-                    current_attempt[i] += 1
-                    break
-                else:
-                    current_attempt[i] = 0
-            # print(current_attempt)
-            # try sub
-            words = re.split(pattern, self.text)
-            j = 0
-            for k in range(len(words)):
-                word: str = words[k]
-                if re.match(pattern, word):
-                    words[k] = param_options[j][current_attempt[j]]
-                    words[k + 1] = ""  # clear next
-                    j += 1
-            full_command = "".join(words)
+        if executor is not None:
+            return executor.execute_command(self.text)
+
+        for full_command in substitute_parameters(self.text):
             print("> " + full_command)
-            # return_code = subprocess.call(full_command, shell=True)
-            # if return_code == 0:
-            #     break
+        return None
 
 
 class Activity:
@@ -85,11 +53,37 @@ class Activity:
         self.name = name
         self.index = index
         self.commands = commands
+        # parameter name -> parameter type
+        self.produces = {}
+
+    def consumes(self) -> List[str]:
+        """
+        Parameters required by the commands of this activity.
+        :return: unique parameter names, in order of appearance.
+        """
+        result = []
+        for command in self.commands:
+            for name in command.get_parameter_names():
+                if name not in result:
+                    result.append(name)
+        return result
 
-    def execute_activity(self) -> None:
+    def execute_activity(self, executor: Optional[Executor] = None) -> Optional[bool]:
+        """
+        Executes the commands in order, stopping at the first command which fails.
+        Without an executor, the possible substitutions of every command are only printed.
+        :return: true if every command executed successfully, or None if the commands were only printed.
+        """
         print(f"Executing activity. idx:{self.index} name:{self.name}")
+        if executor is None:
+            for command in self.commands:
+                command.execute_command()
+            return None
+
         for command in self.commands:
-            command.execute_command()
+            if not command.execute_command(executor):
+                return False
+        return True
 
 
 class SecurityAttribute:
@@ -372,6 +366,89 @@ class SecurityAttributeStore:
         pass
 
 
+# types of parameter an activity may produce.
+parameter_types: List[str] = ["token", "identity", "credential", "resource"]
+
+
+class ParameterStore:
+    """
+    Represents a file containing the parameters produced by activities.
+    An activity produces a parameter when its output (i.e. a token, identity or credential) may be
+    substituted into the commands of another activity.
+    Every produced parameter has a type, one of parameter_types.
+    Consumed parameters are not stored, they are read from the command text.
+
+    FILE FORMAT:
+    (activity_index),(parameter_name1):(parameter_type1),(parameter_nameN):(parameter_typeN)
+    (activity_index),(parameter_name1):(parameter_type1),(parameter_nameN):(parameter_typeN)
+    (activity_index),(parameter_name1):(parameter_type1),(parameter_nameN):(parameter_typeN)
+    """
+
+    def __init__(self, file_name: str, activity_store: ActivityStore):
+        """
+        Attempts to load an existing parameter store, marking the produced parameters on each activity.
+        If the store is not found, a new one is created.
+        :param file_name: the file to save the parameter store in.
+        """
+        self.file_name = file_name
+        self.activity_store = activity_store
+
+        if not exists(file_name):
+            return
+
+        # load produced parameters
+        file = open(file_name, "r")
+
+        loaded = set()
+        lines = file.readlines()[1:]
+        for line in lines:
+            cols = line.rstrip().split(",")
+            if len(cols) < 2:
+                raise Exception("Format error")
+
+            activity_index = int(cols[0])
+            if activity_index in loaded:
+                raise Exception("Format error, activity " + str(activity_index) + " appears more than once")
+            loaded.add(activity_index)
+
+            activity = self.activity_store.get_activity_by_index(activity_index)
+            activity.produces = {}
+            for col in cols[1:]:
+                parameter = col.split(":")
+                if len(parameter) != 2:
+                    raise Exception("Format error")
+                self.add_produced_parameter(activity, parameter[0], parameter[1])
+
+        file.close()
+
+    def save(self) -> None:
+        """
+        Saves the produced parameters to disk.
+        Activities which produce nothing are omitted.
+        :return: None
+        """
+        file = open(self.file_name, "w+")
+        indexes = list(self.activity_store.store.keys())
+        indexes.sort()
+
+        file.write("index,produces(1..n)\n")
+        for index in indexes:
+            activity = self.activity_store.store[index]
+            if not activity.produces:
+                continue
+            file.write(str(activity.index))
+            for name, parameter_type in activity.produces.items():
+                file.write("," + name + ":" + parameter_type)
+            file.write("\n")
+
+        file.close()
+
+    def add_produced_parameter(self, activity: Activity, name: str, parameter_type: str) -> None:
+        if parameter_type not in parameter_types:
+            raise Exception("Unknown parameter type '" + parameter_type + "'")
+        activity.produces[convert_to_file_name(name)] = parameter_type
+
+
 class Target:
     """
     A target is a set of multiple security attributes that pertain to a specific target.
@@ -427,6 +504,18 @@ class Target:
     def add_attribute(self, attr: SecurityAttribute) -> None:
         self.attributes.append(attr)
 
+    def get_activities(self) -> List[Activity]:
+        """
+        Flattens the security attributes of this target.
+        :return: unique activities, in order of appearance.
+        """
+        result = []
+        for attr in self.attributes:
+            for activity in attr.activities:
+                if activity not in result:
+                    result.append(activity)
+        return result
+
 
 def main() -> None:
     # Create stores
@@ -483,6 +572,7 @@ def importer():
     command_store = CommandStore("commands.csv")
     activity_store = ActivityStore("activities.csv", command_store)
     attribute_store = SecurityAttributeStore("attributes.csv", activity_store)
+    parameter_store = ParameterStore("parameters.csv", activity_store)
 
     target_name = input("ENTER TARGET NAME: ")
     target_file_name = convert_to_file_name(target_name) + ".csv"
@@ -496,6 +586,15 @@ def importer():
         except EOFError:
             break
         commands.append(line)
+    print("ENTER PRODUCED PARAMETERS: (name:type per line, type is one of " + "/".join(parameter_types)
+          + ", and Ctrl-Z when done)")
+    produces = []
+    while True:
+        try:
+            line = input()
+        except EOFError:
+            break
+        produces.append(line.split(":"))
 
     target = Target(target_name, target_file_name, attribute_store)
     attr = attribute_store.get_attribute_by_name(attribute_name)
@@ -504,6 +603,10 @@ def importer():
     activity = activity_store.new_activity(activity_name, [
         command_store.get_command_by_text(cmd) for cmd in commands
     ])
+    for parameter in produces:
+        if len(parameter) != 2:
+            raise Exception("Format error")
+        parameter_store.add_produced_parameter(activity, parameter[0], parameter[1])
 
     attr.add_activity(activity)
 
@@ -515,6 +618,7 @@ def importer():
     command_store.save()
     activity_store.save()
     attribute_store.save()
+    parameter_store.save()
     target.save()
 
 
@@ -0,0 +1,188 @@
+# Execution layer for generated commands.
+# Parameters are substituted from the param files, then each substitution is run through a backend
+# until one succeeds. The backend is pluggable, MockShellBackend runs nothing and answers with scripted exit codes.
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from substitution import substitute_parameters
+
+# exit code reported when a command exceeds its timeout, as per coreutils 'timeout'.
+TIMEOUT_EXIT_CODE: int = 124
+
+
+class Backend(ABC):
+    """
+    Runs a single, fully substituted command.
+    Subclass to provide a new way of executing commands.
+    """
+
+    @abstractmethod
+    def run(self, command: str, timeout: float) -> int:
+        """
+        Runs the command.
+        :param command: the full command.
+        :param timeout: seconds before the command is abandoned.
+        :return: the exit code, or TIMEOUT_EXIT_CODE.
+        """
+
+
+class SubprocessBackend(Backend):
+    """
+    Runs commands in a local shell.
+    Commands will act on whichever tenant the shell is logged in to.
+    Each command runs in its own process group, so a timeout kills the shell and everything it started.
+    """
+
+    def run(self, command: str, timeout: float) -> int:
+        if sys.platform == "win32":
+            process = subprocess.Popen(command, shell=True, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            process = subprocess.Popen(command, shell=True, start_new_session=True)
+
+        try:
+            return process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._kill(process)
+            process.wait()
+            return TIMEOUT_EXIT_CODE
+
+    @staticmethod
+    def _kill(process: subprocess.Popen) -> None:
+        """Kills the shell and every process it started."""
+        if sys.platform == "win32":
+            # taskkill /T ends the whole tree, Popen.kill would only end the shell
+            try:
+                subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except OSError:
+                pass
+            if process.poll() is None:
+                process.kill()
+        else:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                # the whole group exited after the timeout
+                pass
+
+
+class MockShellBackend(Backend):
+    """
+    A local stand-in for a shell, no command is run.
+    Commands are recorded in history and answered with scripted exit codes.
+    Durations are simulated rather than slept, so replaying is fast and reproducible.
+    History is in the order the backend was called, which varies between concurrent runs, see get_history.
+    """
+
+    def __init__(self, exit_codes: Optional[Dict[str, int]] = None, durations: Optional[Dict[str, float]] = None,
+                 default_exit_code: int = 0):
+        """
+        :param exit_codes: regex -> exit code, the first pattern found in the command is used.
+        :param durations: regex -> simulated seconds, commands longer than the timeout return TIMEOUT_EXIT_CODE.
+        :param default_exit_code: exit code for commands matching no pattern.
+        """
+        self.exit_codes = [(re.compile(pattern), code) for pattern, code in (exit_codes or {}).items()]
+        self.durations = [(re.compile(pattern), seconds) for pattern, seconds in (durations or {}).items()]
+        self.default_exit_code = default_exit_code
+        self.history: List[str] = []
+        self._lock = threading.Lock()
+
+    def run(self, command: str, timeout: float) -> int:
+        with self._lock:
+            self.history.append(command)
+
+        for pattern, seconds in self.durations:
+            if pattern.search(command):
+                if seconds > timeout:
+                    return TIMEOUT_EXIT_CODE
+                break
+
+        for pattern, code in self.exit_codes:
+            if pattern.search(command):
+                return code
+        return self.default_exit_code
+
+
+class DerivationResult:
+    """
+    The outcome of executing one derivation, i.e. one possible attack expanded from the cfg.
+    Contains the derivation, every attempted command with its exit code, and whether all commands succeeded.
+    """
+
+    def __init__(self, derivation: List[str]):
+        self.derivation = derivation
+        self.attempts: List[Tuple[str, int]] = []
+        self.success = False
+
+
+class Executor:
+    """
+    Executes commands and derivations through a backend.
+    Substitutions of a command are tried in order, stopping at the first success.
+    A derivation stops at the first command for which no substitution succeeds.
+    Independent derivations are executed concurrently, up to max_workers at a time.
+    """
+
+    def __init__(self, backend: Backend, timeout: float = 60.0, max_workers: int = 4):
+        """
+        :param backend: runs the substituted commands.
+        :param timeout: seconds allowed per command.
+        :param max_workers: maximum derivations executed at once.
+        """
+        self.backend = backend
+        self.timeout = timeout
+        self.max_workers = max_workers
+
+    def execute_command(self, command: str, attempts: Optional[List[Tuple[str, int]]] = None) -> bool:
+        """
+        Executes provided command with command substitution from param files.
+        :param command: the command text, which may contain parameters.
+        :param attempts: if given, each attempted command and its exit code is appended.
+        :return: true if any substitution executed successfully.
+        """
+        for full_command in substitute_parameters(command):
+            return_code = self.backend.run(full_command, self.timeout)
+            if attempts is not None:
+                attempts.append((full_command, return_code))
+            if return_code == 0:
+                return True
+        return False
+
+    def execute_derivation(self, derivation: List[str]) -> DerivationResult:
+        """
+        Executes the commands of a derivation in order.
+        Stops at the first command for which no substitution succeeds.
+        :param derivation: the command texts, i.e. one result of cfg.expand.
+        :return: the attempted commands, and whether every command succeeded.
+        """
+        result = DerivationResult(derivation)
+        for command in derivation:
+            if not self.execute_command(command, result.attempts):
+                return result
+        result.success = True
+        return result
+
+    def execute_derivations(self, derivations: List[List[str]]) -> List[DerivationResult]:
+        """
+        Executes independent derivations concurrently.
+        :param derivations: the derivations, i.e. as produced by cfg.expand.
+        :return: results in the same order as the derivations.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.execute_derivation, derivations))
+
+
+def get_history(results: List[DerivationResult]) -> List[str]:
+    """
+    Every attempted command, in order of the derivations then attempts.
+    Unlike the order the backend was called in, this does not depend on how the workers were scheduled.
+    """
+    return [command for result in results for command, _ in result.attempts]
+
@@ -0,0 +1,202 @@
+# Offline dependency graph between activities.
+# An edge A -> B exists when activity A produces a parameter that activity B consumes,
+# i.e. the output of A (a token, identity or credential) enables B.
+# Chains are enumerated between the activities of two targets, no commands are executed.
+from collections import deque
+from typing import Collection, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from database import Activity, ActivityStore, CommandStore, ParameterStore, SecurityAttributeStore, Target
+
+# target name -> target file.
+targets: dict[str, str] = {
+    "AD": "ad.csv",
+    "Azure Storage": "azure-storage.csv",
+    "Group": "group.csv",
+    "Identity": "identity.csv",
+    "KeyVault": "keyvault.csv",
+    "Login": "login.csv",
+    "Network": "network.csv",
+    "Role": "role.csv",
+    "Storage": "storage.csv",
+    "VM": "vm.csv",
+}
+
+# maximum number of steps (one activity enabling the next) in a single chain.
+max_chain_depth: int = 4
+
+
+class Chain:
+    """
+    An ordered list of activities, where each activity enables the next.
+    Contains the activities, and for every step the parameters (name -> type) passed between the pair of activities.
+    """
+
+    def __init__(self, activities: List[Activity], parameters: List[Dict[str, str]]):
+        self.activities = activities
+        self.parameters = parameters
+
+    def __len__(self) -> int:
+        return len(self.activities)
+
+    def __str__(self) -> str:
+        text = self.activities[0].name
+        for i in range(len(self.parameters)):
+            labels = ", ".join(name + ":" + self.parameters[i][name] for name in sorted(self.parameters[i]))
+            text += " --[" + labels + "]--> " + self.activities[i + 1].name
+        return text
+
+
+class ActivityGraph:
+    """
+    A directed graph of activities, linked by the typed parameters they produce and consume.
+    Distances to a set of destinations are memoised, so repeated searches over the same graph are cheap.
+    """
+
+    def __init__(self, activities: List[Activity]):
+        """
+        Builds the graph from the produced and consumed parameters of the activities.
+        :param activities: the activities to include, i.e. all activities of an activity store.
+        """
+        self.activities: Dict[int, Activity] = {}
+        # activity index -> next activity index -> parameter name -> parameter type
+        self.edges: Dict[int, Dict[int, Dict[str, str]]] = {}
+        self.reverse_edges: Dict[int, Set[int]] = {}
+        self._distances: Dict[Tuple[FrozenSet[int], int, Optional[FrozenSet[str]]], Dict[int, int]] = {}
+
+        for activity in activities:
+            self.activities[activity.index] = activity
+            self.edges[activity.index] = {}
+            self.reverse_edges[activity.index] = set()
+
+        # index by parameter, rather than comparing every pair of activities
+        producers: Dict[str, List[int]] = {}
+        for activity in activities:
+            for name in activity.produces:
+                producers.setdefault(name, []).append(activity.index)
+
+        for activity in activities:
+            for name in activity.consumes():
+                for producer in producers.get(name, []):
+                    # an activity cannot enable itself
+                    if producer == activity.index:
+                        continue
+                    parameter_type = self.activities[producer].produces[name]
+                    self.edges[producer].setdefault(activity.index, {})[name] = parameter_type
+                    self.reverse_edges[activity.index].add(producer)
+
+    def get_edge_parameters(self, source: int, destination: int) -> Dict[str, str]:
+        return dict(self.edges[source].get(destination, {}))
+
+    def is_edge_allowed(self, source: int, destination: int, parameter_types: Optional[FrozenSet[str]]) -> bool:
+        """
+        An edge is allowed when it passes at least one parameter of the given types.
+        :param parameter_types: the allowed types, or None to allow any edge.
+        """
+        if parameter_types is None:
+            return True
+        return any(x in parameter_types for x in self.edges[source][destination].values())
+
+    def distances_to(self, destinations: FrozenSet[int], max_depth: int = max_chain_depth,
+                     parameter_types: Optional[FrozenSet[str]] = None) -> Dict[int, int]:
+        """
+        Reverse breadth first search from the destinations.
+        :param destinations: indexes of the destination activities.
+        :param max_depth: the maximum number of steps taken.
+        :param parameter_types: only follow edges passing a parameter of these types, or None for all edges.
+        :return: activity index -> fewest steps required to reach any destination.
+        """
+        key = (destinations, max_depth, parameter_types)
+        if key in self._distances:
+            return self._distances[key]
+
+        distances = {index: 0 for index in destinations if index in self.activities}
+        queue = deque(distances.keys())
+        while queue:
+            current = queue.popleft()
+            if distances[current] >= max_depth:
+                continue
+            for previous in self.reverse_edges[current]:
+                if previous not in distances and self.is_edge_allowed(previous, current, parameter_types):
+                    distances[previous] = distances[current] + 1
+                    queue.append(previous)
+
+        self._distances[key] = distances
+        return distances
+
+    def find_chains(self, sources: List[Activity], destinations: List[Activity],
+                    max_depth: int = max_chain_depth, limit: Optional[int] = None,
+                    parameter_types: Optional[Collection[str]] = None) -> List[Chain]:
+        """
+        Depth first search for chains from a source activity to a destination activity.
+        Branches which cannot reach a destination within the remaining depth are pruned.
+        :param sources: the activities a chain may start with.
+        :param destinations: the activities a chain may end with.
+        :param max_depth: the maximum number of steps in a chain.
+        :param limit: stop after this many chains, or None for all chains.
+        :param parameter_types: every step must pass a parameter of these types, or None for any step.
+        :return: chains with at least one step, without repeated activities.
+        """
+        allowed = frozenset(parameter_types) if parameter_types is not None else None
+        destination_indexes = frozenset(x.index for x in destinations)
+        distances = self.distances_to(destination_indexes, max_depth, allowed)
+        result: List[Chain] = []
+
+        def search(path: List[int]) -> bool:
+            current = path[-1]
+            remaining = max_depth - (len(path) - 1)
+            for nxt in self.edges[current]:
+                if nxt in path or distances.get(nxt, max_depth + 1) > remaining - 1:
+                    continue
+                if not self.is_edge_allowed(current, nxt, allowed):
+                    continue
+                path.append(nxt)
+                if nxt in destination_indexes:
+                    result.append(self._to_chain(path))
+                    if limit is not None and len(result) >= limit:
+                        return False
+                if not search(path):
+                    return False
+                path.pop()
+            return True
+
+        for source in sources:
+            if source.index not in distances:
+                continue
+            if not search([source.index]):
+                break
+
+        return result
+
+    def find_chains_between_targets(self, source: Target, destination: Target,
+                                    max_depth: int = max_chain_depth, limit: Optional[int] = None,
+                                    parameter_types: Optional[Collection[str]] = None) -> List[Chain]:
+        return self.find_chains(source.get_activities(), destination.get_activities(), max_depth, limit,
+                                parameter_types)
+
+    def _to_chain(self, path: List[int]) -> Chain:
+        activities = [self.activities[index] for index in path]
+        parameters = [self.get_edge_parameters(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        return Chain(activities, parameters)
+
+
+if __name__ == '__main__':
+    # load stores, read only
+    command_store = CommandStore("commands.csv")
+    activity_store = ActivityStore("activities.csv", command_store)
+    attribute_store = SecurityAttributeStore("attributes.csv", activity_store)
+    parameter_store = ParameterStore("parameters.csv", activity_store)
+    loaded_targets = [Target(name, file_name, attribute_store) for name, file_name in targets.items()]
+
+    graph = ActivityGraph(list(activity_store.store.values()))
+
+    # enumerate candidate chains between every pair of targets
+    for source_target in loaded_targets:
+        for destination_target in loaded_targets:
+            chains = graph.find_chains_between_targets(source_target, destination_target)
+            if not chains:
+                continue
+            print("----------------------------------------------------\n")
+            print(f"Possible lateral movement: {source_target.name} -> {destination_target.name}")
+            for chain in chains:
+                print("\t> " + str(chain))
+            print("\n")
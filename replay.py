@@ -0,0 +1,21 @@
+# Replays the attacks generated from the cfg against a local stand-in, no real tenant is touched.
+from cfg import expand, starting_state
+from executor import Executor, MockShellBackend, get_history
+
+if __name__ == '__main__':
+    # expand left derivation tree
+    results: list[list[str]] = []
+    expand(starting_state, [], results)
+
+    # replay against a local stand-in, the sql server refuses connections.
+    backend = MockShellBackend(exit_codes={r"^Invoke-Sqlcmd": 1})
+    executor = Executor(backend)
+    derivation_results = executor.execute_derivations(results)
+
+    for result in derivation_results:
+        print("----------------------------------------------------\n")
+        print("Attack succeeded: " if result.success else "Attack failed: ")
+        for command, return_code in result.attempts:
+            print(f"\t[{return_code}] > {command}")
+        print("\n")
+    print(f"Commands executed: {len(get_history(derivation_results))}")
@@ -0,0 +1,77 @@
+# Parameter substitution, shared by cfg.py, database.py and executor.py.
+# Parameters are written in the command text, i.e. <resource-group>, and their options are read from
+# the param files in /params, one option per line.
+import itertools
+import re
+import threading
+from os.path import abspath, exists
+from typing import Dict, Iterator, List
+
+parameter_pattern = re.compile(r"([\<|\[|\{\(](\S*)[\>|\]|\}|\)])", re.MULTILINE)
+
+# param file -> options, loaded once per process until clear_parameter_options is called.
+_parameter_options: Dict[str, List[str]] = {}
+_parameter_lock = threading.Lock()
+
+
+def convert_to_file_name(file_name: str) -> str:
+    """Converts string to safe filename"""
+    file_name = str(file_name).replace(" ", "-")
+    return "".join(x for x in file_name if x.isalnum() or x == "-")
+
+
+def get_parameter_options(name: str) -> List[str]:
+    """
+    Loads the options for a parameter from its param file.
+    If the file does not exist, an empty one is created.
+    :param name: the parameter name, as written in the command.
+    :return: a copy of the options, one per line of the param file.
+    """
+    file_name = "params/" + convert_to_file_name(name) + ".csv"
+    key = abspath(file_name)
+
+    with _parameter_lock:
+        if key in _parameter_options:
+            return list(_parameter_options[key])
+
+        # create the file if not exists
+        if not exists(file_name):
+            file = open(file_name, "x")
+            file.close()
+
+        file = open(file_name, "r")
+        ops = [line.rstrip() for line in file]
+        file.close()
+
+        _parameter_options[key] = ops
+        return list(ops)
+
+
+def clear_parameter_options() -> None:
+    """
+    Forgets the loaded param files, so edits made since they were loaded are seen.
+    :return: None
+    """
+    with _parameter_lock:
+        _parameter_options.clear()
+
+
+def substitute_parameters(command: str) -> Iterator[str]:
+    """
+    Generates every substitution of the parameters in the command.
+    Nothing is generated if a parameter has no options.
+    :param command: the command text.
+    :return: the full commands, in order of the param file options.
+    """
+    matches = [match for match in re.finditer(parameter_pattern, command) if match.group(2)]
+    param_options = [get_parameter_options(match.group(2)) for match in matches]
+
+    for attempt in itertools.product(*param_options):
+        words = []
+        last = 0
+        for match, option in zip(matches, attempt):
+            words.append(command[last:match.start()])
+            words.append(option)
+            last = match.end()
+        words.append(command[last:])
+        yield "".join(words)
@@ -0,0 +1,147 @@
+import random
+import sys
+import time
+
+import pytest
+
+from database import Activity, Command
+from executor import TIMEOUT_EXIT_CODE, Backend, Executor, MockShellBackend, SubprocessBackend, get_history
+from substitution import clear_parameter_options, get_parameter_options
+
+
+@pytest.fixture
+def params(tmp_path, monkeypatch):
+    """Param files within a temporary working directory."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "params").mkdir()
+    (tmp_path / "params" / "username.csv").write_text("john\nbob\n")
+    (tmp_path / "params" / "password.csv").write_text("one\ntwo\nthree\n")
+    return tmp_path
+
+
+class SleepingBackend(Backend):
+    """Finishes commands in a random order, and records the order they were called in."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.calls = []
+
+    def run(self, command: str, timeout: float) -> int:
+        time.sleep(self.rng.random() / 100)
+        self.calls.append(command)
+        return 0
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        Backend()
+
+
+def test_execute_command_stops_at_first_success(params):
+    executor = Executor(MockShellBackend(exit_codes={"-u bob -p two": 0}, default_exit_code=1))
+    attempts = []
+
+    assert executor.execute_command("az login -u <username> -p <password>", attempts)
+    assert attempts == [
+        ("az login -u john -p one", 1),
+        ("az login -u john -p two", 1),
+        ("az login -u john -p three", 1),
+        ("az login -u bob -p one", 1),
+        ("az login -u bob -p two", 0),
+    ]
+
+
+def test_execute_command_fails_when_no_substitution_succeeds(params):
+    executor = Executor(MockShellBackend(default_exit_code=1))
+    attempts = []
+
+    assert not executor.execute_command("az login -u <username> -p <password>", attempts)
+    assert len(attempts) == 6
+
+
+def test_empty_param_file_produces_no_attempts(params):
+    executor = Executor(MockShellBackend())
+    attempts = []
+
+    assert not executor.execute_command("az keyvault secret show --id <secret-id>", attempts)
+    assert attempts == []
+    assert (params / "params" / "secret-id.csv").exists()
+
+
+def test_mock_timeout(params):
+    backend = MockShellBackend(durations={"-u john": 90})
+    executor = Executor(backend, timeout=30)
+    attempts = []
+
+    assert executor.execute_command("az login -u <username> -p <password>", attempts)
+    assert [code for _, code in attempts] == [TIMEOUT_EXIT_CODE] * 3 + [0]
+
+
+def test_derivation_stops_at_failed_command(params):
+    executor = Executor(MockShellBackend(exit_codes={"^az vm": 1}))
+    result = executor.execute_derivation(["az login -u <username>", "az vm list", "az keyvault list"])
+
+    assert not result.success
+    assert result.attempts == [("az login -u john", 0), ("az vm list", 1)]
+
+
+def test_execute_derivations_keeps_order(params):
+    derivations = [["echo " + str(i) + " -u <username>", "echo done " + str(i)] for i in range(20)]
+    backend = SleepingBackend(seed=1)
+    results = Executor(backend, max_workers=8).execute_derivations(derivations)
+
+    assert [x.derivation for x in results] == derivations
+    assert all(x.success for x in results)
+    expected = [command for i in range(20) for command in ["echo " + str(i) + " -u john", "echo done " + str(i)]]
+    assert get_history(results) == expected
+    assert sorted(backend.calls) == sorted(expected)
+
+
+def delayed_touch(marker) -> str:
+    """A command whose child process creates the marker after about a second."""
+    if sys.platform == "win32":
+        return 'cmd /c "ping -n 2 127.0.0.1 >nul & type nul > ' + str(marker) + '"'
+    return "(sleep 1; touch " + str(marker) + "); true"
+
+
+def test_subprocess_timeout_kills_child_processes(tmp_path):
+    marker = tmp_path / "marker"
+    start = time.monotonic()
+
+    assert SubprocessBackend().run(delayed_touch(marker), 0.2) == TIMEOUT_EXIT_CODE
+    assert time.monotonic() - start < 1
+
+    time.sleep(2)
+    assert not marker.exists()
+
+
+def test_subprocess_exit_code():
+    assert SubprocessBackend().run("exit 3", 5) == 3
+    assert SubprocessBackend().run("exit 0", 5) == 0
+
+
+def test_mock_records_history(params):
+    backend = MockShellBackend(exit_codes={"-u bob": 0}, default_exit_code=1)
+    Executor(backend).execute_command("az login -u <username>")
+
+    assert backend.history == ["az login -u john", "az login -u bob"]
+
+
+def test_parameter_options_are_copied_and_clearable(params):
+    options = get_parameter_options("username")
+    options.append("mallory")
+    assert get_parameter_options("username") == ["john", "bob"]
+
+    (params / "params" / "username.csv").write_text("alice\n")
+    assert get_parameter_options("username") == ["john", "bob"]
+    clear_parameter_options()
+    assert get_parameter_options("username") == ["alice"]
+
+
+def test_activity_execution(params):
+    commands = [Command(0, "az login -u <username>"), Command(1, "az vm list")]
+    activity = Activity("LoginAndList", 0, commands)
+
+    assert activity.execute_activity() is None
+    assert activity.execute_activity(Executor(MockShellBackend())) is True
+    assert activity.execute_activity(Executor(MockShellBackend(exit_codes={"^az vm": 1}))) is False
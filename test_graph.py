@@ -0,0 +1,144 @@
+import random
+
+import pytest
+
+from database import Activity, ActivityStore, Command, CommandStore, ParameterStore
+from graph import ActivityGraph
+
+
+def make_activity(index: int, text: str, produces: dict) -> Activity:
+    activity = Activity("A" + str(index), index, [Command(index, text)])
+    activity.produces = produces
+    return activity
+
+
+def brute_force_chains(activities, sources, destinations, max_depth, parameter_types=None):
+    """Every simple path of 1..max_depth steps, without pruning."""
+    graph = ActivityGraph(activities)
+    destination_indexes = {x.index for x in destinations}
+    result = []
+
+    def search(path):
+        if len(path) - 1 >= max_depth:
+            return
+        for nxt in graph.edges[path[-1]]:
+            if nxt in path or not graph.is_edge_allowed(path[-1], nxt, parameter_types):
+                continue
+            if nxt in destination_indexes:
+                result.append(tuple(path + [nxt]))
+            search(path + [nxt])
+
+    for source in sources:
+        search([source.index])
+    return sorted(result)
+
+
+def chain_paths(chains):
+    return sorted(tuple(x.index for x in chain.activities) for chain in chains)
+
+
+def test_edges_link_producer_to_consumer():
+    login = make_activity(0, "az login --identity", {"identity-id": "identity"})
+    assign = make_activity(1, "az role assignment create --assignee <identity-id>", {})
+    graph = ActivityGraph([login, assign])
+
+    assert graph.get_edge_parameters(0, 1) == {"identity-id": "identity"}
+    assert graph.edges[1] == {}
+
+
+def test_activity_does_not_enable_itself():
+    group = make_activity(0, "az group create --name <resource-group>", {"resource-group": "resource"})
+    graph = ActivityGraph([group])
+
+    assert graph.edges[0] == {}
+    assert graph.find_chains([group], [group]) == []
+
+
+def test_find_chains_respects_max_depth():
+    activities = [make_activity(0, "first", {"p0": "token"})]
+    for i in range(1, 5):
+        activities.append(make_activity(i, "step <p" + str(i - 1) + ">", {"p" + str(i): "token"}))
+    graph = ActivityGraph(activities)
+
+    assert chain_paths(graph.find_chains(activities[:1], activities[-1:], max_depth=4)) == [(0, 1, 2, 3, 4)]
+    assert graph.find_chains(activities[:1], activities[-1:], max_depth=3) == []
+
+
+def test_find_chains_filters_parameter_types():
+    secrets = make_activity(0, "az keyvault secret list", {"secret-id": "resource"})
+    show = make_activity(1, "az keyvault secret show --id <secret-id>", {"password": "credential"})
+    login = make_activity(2, "az login -p <password>", {})
+    activities = [secrets, show, login]
+    graph = ActivityGraph(activities)
+
+    assert chain_paths(graph.find_chains([secrets, show], [login])) == [(0, 1, 2), (1, 2)]
+    assert chain_paths(graph.find_chains([secrets, show], [login], parameter_types=["credential"])) == [(1, 2)]
+
+
+def test_find_chains_limit():
+    source = make_activity(0, "source", {"token": "token"})
+    consumers = [make_activity(i, "use <token>", {}) for i in range(1, 6)]
+    graph = ActivityGraph([source] + consumers)
+
+    assert len(graph.find_chains([source], consumers, limit=2)) == 2
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_find_chains_matches_brute_force(seed):
+    rng = random.Random(seed)
+    names = ["p" + str(i) for i in range(12)]
+    types = ["token", "identity", "credential", "resource"]
+    activities = []
+    for i in range(40):
+        text = " ".join("<" + x + ">" for x in rng.sample(names, 2))
+        activities.append(make_activity(i, text, {rng.choice(names): rng.choice(types)}))
+    sources = activities[:8]
+    destinations = activities[-8:]
+    graph = ActivityGraph(activities)
+
+    for parameter_types in [None, frozenset(["token", "credential"])]:
+        expected = brute_force_chains(activities, sources, destinations, 3, parameter_types)
+        chains = graph.find_chains(sources, destinations, max_depth=3, parameter_types=parameter_types)
+        assert chain_paths(chains) == expected
+
+
+def test_parameter_store_round_trip(tmp_path):
+    command_store = CommandStore(str(tmp_path / "commands.csv"))
+    activity_store = ActivityStore(str(tmp_path / "activities.csv"), command_store)
+    create = activity_store.new_activity("CreateOwnerServicePrincipal", [
+        command_store.get_command_by_text("az ad sp create-for-rbac")
+    ])
+    activity_store.new_activity("ListKeyvaults", [command_store.get_command_by_text("az keyvault list")])
+
+    parameter_store = ParameterStore(str(tmp_path / "parameters.csv"), activity_store)
+    parameter_store.add_produced_parameter(create, "service-principal-id", "identity")
+    parameter_store.add_produced_parameter(create, "password", "credential")
+    parameter_store.save()
+
+    command_store.save()
+    activity_store.save()
+    loaded_command_store = CommandStore(str(tmp_path / "commands.csv"))
+    loaded_activity_store = ActivityStore(str(tmp_path / "activities.csv"), loaded_command_store)
+    ParameterStore(str(tmp_path / "parameters.csv"), loaded_activity_store)
+
+    loaded = loaded_activity_store.get_activity_by_index(create.index)
+    assert loaded.produces == {"service-principal-id": "identity", "password": "credential"}
+    assert loaded_activity_store.get_activity_by_index(1).produces == {}
+
+
+def test_parameter_store_rejects_unknown_type(tmp_path):
+    activity_store = ActivityStore(str(tmp_path / "activities.csv"), CommandStore(str(tmp_path / "commands.csv")))
+    activity = activity_store.new_activity("LoginIdentity", [])
+
+    with pytest.raises(Exception):
+        ParameterStore(str(tmp_path / "parameters.csv"), activity_store).add_produced_parameter(
+            activity, "access-token", "secret")
+
+
+def test_parameter_store_rejects_duplicate_index(tmp_path):
+    activity_store = ActivityStore(str(tmp_path / "activities.csv"), CommandStore(str(tmp_path / "commands.csv")))
+    activity_store.new_activity("CreateOwnerServicePrincipal", [])
+    (tmp_path / "parameters.csv").write_text("index,produces(1..n)\n0,password:credential\n0,tenant:resource\n")
+
+    with pytest.raises(Exception):
+        ParameterStore(str(tmp_path / "parameters.csv"), activity_store)